@@ -0,0 +1,241 @@
+"""Microbenchmarks for Mathify's hot functions.
+
+Runs headless with the SDL dummy drivers. Save a baseline on a known-good
+build, then compare a new build against it before rolling it out:
+
+    python benchmark_mathify.py run --save benchmark_baseline.json
+    python benchmark_mathify.py compare benchmark_baseline.json --threshold 0.15
+
+`compare` exits with status 1 when any benchmark is slower than the
+baseline by more than the threshold. It refuses to run (status 2) against a
+baseline taken on a different machine or Python, pygame or SDL version,
+since the numbers would measure the difference in setup, not in code;
+pass --allow-env-mismatch to compare anyway.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+
+# Environment fields that must match for timings to be comparable
+COMPARABLE_ENVIRONMENT = ("python", "pygame", "sdl", "machine", "node")
+
+# Must be set before pygame is imported by mathify_pygame
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+# The game loads its assets relative to the working directory
+START_DIR = os.getcwd()
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+import pygame
+import mathify_pygame as mathify
+
+
+def build_benchmarks(game):
+    """Return an ordered list of (name, callable) pairs to time."""
+    benchmarks = []
+
+    for difficulty in ('easy', 'medium', 'hard'):
+        def generate(difficulty=difficulty):
+            game.difficulty = difficulty
+            game.generate_question()
+        benchmarks.append((f"generate_question[{difficulty}]", generate))
+
+    # check_answer mutates the game; restore it so the screens drawn later
+    # show the same score and state however many times this ran
+    touched = ("state", "has_answered", "is_correct", "score", "time_bonus",
+               "feedback_timer", "particles", "user_input")
+
+    def check_answer():
+        saved = {name: getattr(game, name) for name in touched}
+        game.state = "question"
+        game.has_answered = False
+        game.particles = []
+        game.user_input = str(game.correct_answer)
+        game.check_answer()
+        for name, value in saved.items():
+            setattr(game, name, value)
+    benchmarks.append(("check_answer", check_answer))
+
+    benchmarks.append(("draw_text_with_shadow", lambda: game.draw_text_with_shadow(
+        "Test Your Math Skills", mathify.MEDIUM_FONT, mathify.TEXT_COLOR,
+        mathify.WINDOW_WIDTH // 2, 210)))
+
+    card_rect = pygame.Rect(100, 200, 600, 250)
+    benchmarks.append(("draw_card", lambda: game.draw_card(card_rect)))
+
+    button = game.buttons["submit"]
+    benchmarks.append(("Button.draw", lambda: button.draw(game.screen)))
+
+    particle = mathify.Particle(mathify.WINDOW_WIDTH // 2, mathify.WINDOW_HEIGHT // 2,
+                                mathify.SUCCESS_COLOR)
+
+    def particle_update():
+        particle.update()
+        if particle.is_dead():
+            particle.age = 0
+    benchmarks.append(("Particle.update", particle_update))
+
+    # A young particle so there is always something to draw
+    drawn_particle = mathify.Particle(mathify.WINDOW_WIDTH // 2, mathify.WINDOW_HEIGHT // 2,
+                                      mathify.SUCCESS_COLOR)
+    drawn_particle.age = 10
+    benchmarks.append(("Particle.draw", lambda: drawn_particle.draw(game.screen)))
+
+    benchmarks.append(("draw_timer_arc", lambda: game.draw_timer_arc(
+        (mathify.WINDOW_WIDTH // 2, 130), 32, mathify.SUCCESS_COLOR)))
+
+    for state in ("welcome", "question", "feedback", "results"):
+        draw_screen = getattr(game, f"draw_{state}_screen")
+
+        def draw(state=state, draw_screen=draw_screen):
+            game.state = state
+            draw_screen()
+        benchmarks.append((f"draw_{state}_screen", draw))
+
+    return benchmarks
+
+
+def make_game():
+    """Create a game in a representative mid-quiz state."""
+    random.seed(1234)
+    game = mathify.MathifyGame(quality_tier=0)
+    game.difficulty = 'hard'
+    game.start_new_question()
+    game.user_input = "42"
+    game.time_remaining = game.time_limit * 0.7
+    game.score = 27
+    game.is_correct = True
+    game.time_bonus = 3
+    game.percent_beaten = 64.0
+    game.particles = [mathify.Particle(mathify.WINDOW_WIDTH // 2, mathify.WINDOW_HEIGHT // 2,
+                                       mathify.SUCCESS_COLOR) for _ in range(30)]
+    return game
+
+
+def run_benchmarks(repeat=5, only=None):
+    """Time every benchmark and return {name: seconds per call}."""
+    game = make_game()
+    results = {}
+    for name, func in build_benchmarks(game):
+        if only and only not in name:
+            continue
+        timer = timeit.Timer(func)
+        number, _ = timer.autorange()
+        # The fastest run is the one least disturbed by the rest of the system
+        best = min(timer.repeat(repeat=repeat, number=number))
+        results[name] = best / number
+        print(f"{name:28s} {results[name] * 1e6:10.2f} us")
+    return results
+
+
+def environment():
+    """Describe the machine the numbers were taken on."""
+    return {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "sdl": ".".join(str(part) for part in pygame.get_sdl_version()),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "node": platform.node(),
+    }
+
+
+def environment_mismatches(baseline_env, current_env):
+    """Return (field, baseline value, current value) for every field that differs."""
+    return [(field, baseline_env.get(field), current_env[field])
+            for field in COMPARABLE_ENVIRONMENT
+            if baseline_env.get(field) != current_env[field]]
+
+
+def save_results(path, results):
+    """Write results and the environment they were taken on as JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"Saved {len(results)} results to {path}")
+
+
+def compare_results(baseline, current, threshold):
+    """Print a comparison table and return the names that regressed."""
+    regressions = []
+    print(f"{'benchmark':28s} {'baseline':>12s} {'current':>12s} {'change':>8s}")
+    for name, seconds in current.items():
+        if name not in baseline:
+            print(f"{name:28s} {'-':>12s} {seconds * 1e6:10.2f}us {'new':>8s}")
+            continue
+        change = seconds / baseline[name] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSED"
+        print(f"{name:28s} {baseline[name] * 1e6:10.2f}us {seconds * 1e6:10.2f}us "
+              f"{change:+7.1%}{flag}")
+    for name in baseline:
+        if name not in current:
+            print(f"{name:28s} missing from this run")
+    return regressions
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Mathify microbenchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--save", metavar="PATH", help="store results as a JSON baseline")
+
+    compare_parser = subparsers.add_parser("compare", help="run and compare against a baseline")
+    compare_parser.add_argument("baseline", help="baseline JSON written by 'run --save'")
+    compare_parser.add_argument("--threshold", type=float, default=0.15,
+                                help="allowed slowdown as a fraction (default: 0.15)")
+    compare_parser.add_argument("--allow-env-mismatch", action="store_true",
+                                help="compare even if the baseline was taken on another machine or "
+                                     "Python/pygame/SDL version")
+
+    for sub in (run_parser, compare_parser):
+        sub.add_argument("--repeat", type=int, default=5,
+                         help="timing repeats per benchmark; the fastest is kept")
+        sub.add_argument("--only", metavar="TEXT", help="only run benchmarks whose name contains TEXT")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        # Resolve before running; the cwd was switched to the game directory
+        with open(os.path.join(START_DIR, args.baseline), "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        baseline = saved["results"]
+        mismatches = environment_mismatches(saved.get("environment", {}), environment())
+        for field, then, now in mismatches:
+            print(f"Environment differs: {field} was {then!r}, now {now!r}")
+        if mismatches:
+            if not args.allow_env_mismatch:
+                print("Refusing to compare timings from different environments "
+                      "(use --allow-env-mismatch to override)")
+                return 2
+            print("Comparing anyway; differences may come from the environment\n")
+        if args.only:
+            baseline = {name: t for name, t in baseline.items() if args.only in name}
+
+    results = run_benchmarks(repeat=args.repeat, only=args.only)
+
+    if args.command == "run":
+        if args.save:
+            save_results(os.path.join(START_DIR, args.save), results)
+        return 0
+
+    print()
+    regressions = compare_results(baseline, results, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}: "
+              + ", ".join(regressions))
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
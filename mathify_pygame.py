@@ -3,6 +3,20 @@ import pygame
 import sys
 import math
 import os
+import json
+import copy
+import argparse
+import hashlib
+import heapq
+import mmap
+import re
+import socket
+import struct
+import time
+from collections import deque
+
+import mathify_scoring as scoring
+from concurrent.futures import ThreadPoolExecutor
 
 # Initialize Pygame
 pygame.init()
@@ -15,6 +29,35 @@ except pygame.error:
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 600
 FPS = 60
+TRANSITION_MS = 250  # cross-fade length between game states
+TRANSITION_WARMUP_MS = 2  # per-frame budget for filling caches before a fade starts
+TEXT_CACHE_SIZE = 256  # rendered text surfaces kept before the cache is flushed
+HIT_GRID_CELL = 100  # pixel size of the input dispatcher's hit-test grid cells
+ANSWER_MAX_LENGTH = 10
+PROGRESS_BAR_WIDTH = 600
+LEADERBOARD_DIR = "leaderboard"  # one histogram file per running game; may be a shared folder
+
+# Pulsing text per screen: (base font size, relative size swing)
+PULSE_FONTS = {
+    "question": (56, 0.02),
+    "feedback": (72, 0.1),
+    "results": (72, 0.05),
+}
+
+# Question ranges per difficulty
+DIFFICULTIES = {
+    'easy': {'operations': ['+', '-'], 'max_operand': 10},
+    'medium': {'operations': ['+', '-', '*'], 'max_operand': 20},
+    'hard': {'operations': ['+', '-', '*', '/'], 'max_operand': 50},
+}
+DIVISION_MAX = 12  # division uses divisors 2-12 and whole-number answers 1-12
+
+# Practice mode (spaced repetition)
+PRACTICE_DIR = "practice"
+OPERATIONS = ['+', '-', '*', '/']
+FACT_MAX_OPERAND = 50  # one table covers every difficulty's facts
+PRACTICE_RETRY_SECONDS = 20  # a missed fact comes back within the same quiz
+PRACTICE_FIRST_INTERVAL = 60  # seconds until a first correct answer is reviewed
 
 # Colors
 BG_COLOR = (240, 244, 248)
@@ -29,8 +72,31 @@ WHITE = (255, 255, 255)
 DARK_GRAY = (100, 100, 100)
 LIGHT_GRAY = (200, 200, 200)
 SHADOW_COLOR = (0, 0, 0, 30)
+# SHADOW_COLOR pre-blended onto BG_COLOR, for opaque low-quality shadows
+SHADOW_SOLID_COLOR = tuple(int(c * (1 - SHADOW_COLOR[3] / 255)) for c in BG_COLOR)
 BLACK = (0, 0, 0)
 
+# Results-screen (emoji, color) for each of scoring.RESULT_TIERS
+RESULT_STYLES = [
+    (":)", (255, 215, 0)),
+    ("", SUCCESS_COLOR),
+    (":D", PRIMARY_COLOR),
+    (":/", (255, 152, 0)),
+    (":(", ERROR_COLOR),
+]
+
+# Quality tiers, best first. The governor steps down when frames run long.
+QUALITY_TIERS = [
+    {"name": "high", "max_particles": 90, "text_shadows": True,
+     "card_shadows": "soft", "arc_step": 1, "animate_background": True},
+    {"name": "medium", "max_particles": 45, "text_shadows": True,
+     "card_shadows": "solid", "arc_step": 3, "animate_background": True},
+    {"name": "low", "max_particles": 15, "text_shadows": False,
+     "card_shadows": "solid", "arc_step": 6, "animate_background": False},
+    {"name": "minimal", "max_particles": 0, "text_shadows": False,
+     "card_shadows": None, "arc_step": 12, "animate_background": False},
+]
+
 # Fonts
 TITLE_FONT = None
 LARGE_FONT = None
@@ -73,22 +139,30 @@ class Particle:
 class Button:
     """A clickable button with hover effects and animations."""
     
-    def __init__(self, x, y, width, height, text, color, hover_color, text_color=WHITE):
+    def __init__(self, x, y, width, height, text, color, hover_color, text_color=WHITE,
+                 on_click=None):
         self.rect = pygame.Rect(x, y, width, height)
         self.text = text
         self.color = color
         self.hover_color = hover_color
         self.text_color = text_color
+        self.on_click = on_click
         self.is_hovered = False
+        self.is_pressed = False
         self.scale = 1.0
         self.target_scale = 1.0
+        # The label never changes, so render it once; copies share the surface
+        self.text_surface = MEDIUM_FONT.render(text, True, text_color)
     
     def update(self):
         """Update button animation."""
-        self.target_scale = 1.05 if self.is_hovered else 1.0
+        if self.is_pressed:
+            self.target_scale = 0.97
+        else:
+            self.target_scale = 1.05 if self.is_hovered else 1.0
         self.scale += (self.target_scale - self.scale) * 0.3
     
-    def draw(self, screen):
+    def draw(self, screen, shadow=True):
         """Draw the button with shadow and animations."""
         # Calculate scaled dimensions
         scaled_width = int(self.rect.width * self.scale)
@@ -101,35 +175,630 @@ class Button:
         )
         
         # Draw shadow
-        shadow_rect = scaled_rect.copy()
-        shadow_rect.y += 4
-        shadow_surface = pygame.Surface((shadow_rect.width, shadow_rect.height), pygame.SRCALPHA)
-        pygame.draw.rect(shadow_surface, SHADOW_COLOR, shadow_surface.get_rect(), border_radius=10)
-        screen.blit(shadow_surface, shadow_rect)
+        if shadow:
+            shadow_rect = scaled_rect.copy()
+            shadow_rect.y += 4
+            shadow_surface = pygame.Surface((shadow_rect.width, shadow_rect.height), pygame.SRCALPHA)
+            pygame.draw.rect(shadow_surface, SHADOW_COLOR, shadow_surface.get_rect(), border_radius=10)
+            screen.blit(shadow_surface, shadow_rect)
         
         # Draw button
         color = self.hover_color if self.is_hovered else self.color
         pygame.draw.rect(screen, color, scaled_rect, border_radius=10)
         
         # Draw text
-        text_surface = MEDIUM_FONT.render(self.text, True, self.text_color)
-        text_rect = text_surface.get_rect(center=scaled_rect.center)
-        screen.blit(text_surface, text_rect)
+        text_rect = self.text_surface.get_rect(center=scaled_rect.center)
+        screen.blit(self.text_surface, text_rect)
+    
+    def press(self):
+        """Handle a mouse press on the button; the click fires right away."""
+        self.is_pressed = True
+        if self.on_click:
+            self.on_click()
+    
+    def release(self):
+        """Handle the mouse button being released after a press."""
+        self.is_pressed = False
+
+
+class TextEntry:
+    """Editable single-line text with a cursor, fed by TEXTINPUT and KEYDOWN.
+    
+    `allowed` decides whether a character may be inserted at a position,
+    so callers can restrict the entry to, for example, signed integers.
+    """
+    
+    def __init__(self, max_length, allowed=None):
+        self.text = ""
+        self.cursor = 0
+        self.max_length = max_length
+        self.allowed = allowed or (lambda entry, char, position: True)
+    
+    def clear(self):
+        """Empty the entry."""
+        self.text = ""
+        self.cursor = 0
+    
+    def insert(self, text):
+        """Insert typed text at the cursor, skipping disallowed characters."""
+        for char in text:
+            if len(self.text) >= self.max_length:
+                break
+            if self.allowed(self, char, self.cursor):
+                self.text = self.text[:self.cursor] + char + self.text[self.cursor:]
+                self.cursor += 1
+    
+    def handle_key(self, key):
+        """Apply an editing key; return True if the key was used."""
+        if key == pygame.K_BACKSPACE:
+            if self.cursor > 0:
+                self.text = self.text[:self.cursor - 1] + self.text[self.cursor:]
+                self.cursor -= 1
+        elif key == pygame.K_DELETE:
+            self.text = self.text[:self.cursor] + self.text[self.cursor + 1:]
+        elif key == pygame.K_LEFT:
+            self.cursor = max(0, self.cursor - 1)
+        elif key == pygame.K_RIGHT:
+            self.cursor = min(len(self.text), self.cursor + 1)
+        elif key == pygame.K_HOME:
+            self.cursor = 0
+        elif key == pygame.K_END:
+            self.cursor = len(self.text)
+        else:
+            return False
+        return True
+
+
+def integer_char_allowed(entry, char, position):
+    """Allow digits anywhere and a minus sign only in front."""
+    if char.isdigit():
+        # Nothing may go in front of a leading minus sign
+        return not (position == 0 and entry.text.startswith('-'))
+    return char == '-' and position == 0 and not entry.text.startswith('-')
+
+
+class InputDispatcher:
+    """Route mouse events to widgets as they arrive, per game state.
+    
+    Widgets register under a state and are bucketed into a coarse grid of
+    HIT_GRID_CELL-sized cells, so a hit test only checks the widgets in
+    the cell under the pointer.
+    """
+    
+    ALLOWED_EVENTS = [
+        pygame.QUIT, pygame.VIDEORESIZE, pygame.KEYDOWN, pygame.TEXTINPUT,
+        pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP,
+    ]
+    
+    def __init__(self):
+        self.widgets = {}  # state -> [widget]
+        self.grids = {}  # state -> {(column, row): [widget]}
+        self.pointer = (-1, -1)
+        self.pressed = None
+    
+    def install_filter(self):
+        """Keep every event type the game does not handle out of the queue."""
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(self.ALLOWED_EVENTS)
+    
+    def register(self, state, widget):
+        """Make `widget` receive mouse events while the game is in `state`."""
+        self.widgets.setdefault(state, []).append(widget)
+        grid = self.grids.setdefault(state, {})
+        rect = widget.rect
+        for column in range(rect.left // HIT_GRID_CELL, (rect.right - 1) // HIT_GRID_CELL + 1):
+            for row in range(rect.top // HIT_GRID_CELL, (rect.bottom - 1) // HIT_GRID_CELL + 1):
+                grid.setdefault((column, row), []).append(widget)
+    
+    def hit_test(self, state, pos):
+        """Return the widget under `pos` in `state`, or None."""
+        cell = (pos[0] // HIT_GRID_CELL, pos[1] // HIT_GRID_CELL)
+        for widget in self.grids.get(state, {}).get(cell, ()):
+            if widget.rect.collidepoint(pos):
+                return widget
+        return None
+    
+    def refresh_hover(self, state):
+        """Recompute hover for `state`'s widgets at the last pointer position."""
+        hovered = self.hit_test(state, self.pointer)
+        for widget in self.widgets.get(state, ()):
+            widget.is_hovered = widget is hovered
+    
+    def dispatch(self, event, state):
+        """Deliver a mouse event to the widget it hits; return True if handled."""
+        if event.type == pygame.MOUSEMOTION:
+            self.pointer = event.pos
+            self.refresh_hover(state)
+            return True
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            self.pointer = event.pos
+            widget = self.hit_test(state, event.pos)
+            if widget is not None:
+                self.pressed = widget
+                widget.press()
+            return True
+        if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            if self.pressed is not None:
+                self.pressed.release()
+                self.pressed = None
+            return True
+        return False
+
+
+class QualityGovernor:
+    """Pick a quality tier from consecutive windows of frame work times.
+    
+    Steps down a tier when a window's average frame uses more than
+    `degrade_ratio` of the frame budget. Stepping back up needs
+    `upgrade_windows` windows in a row below `upgrade_ratio`, and that
+    requirement doubles (up to `max_upgrade_windows`) each time a step up
+    has to be undone, so a tier that cannot hold is not retried every second.
+    """
+    
+    def __init__(self, target_fps=FPS, window=60, degrade_ratio=0.9,
+                 upgrade_ratio=0.5, upgrade_windows=3, max_upgrade_windows=64,
+                 forced_tier=None):
+        self.budget_ms = 1000 / target_fps
+        self.frame_times = deque(maxlen=window)
+        self.degrade_ratio = degrade_ratio
+        self.upgrade_ratio = upgrade_ratio
+        self.base_upgrade_windows = upgrade_windows
+        self.upgrade_windows = upgrade_windows
+        self.max_upgrade_windows = max_upgrade_windows
+        self.low_windows = 0  # consecutive windows below the upgrade threshold
+        self.last_step = 0  # +1 after a step down, -1 after a step up
+        self.forced = forced_tier is not None
+        self.tier = forced_tier if self.forced else 0
+        self.settings = QUALITY_TIERS[self.tier]
+    
+    def force(self, tier):
+        """Pin the quality tier; pass None to hand control back to the governor."""
+        self.forced = tier is not None
+        self._set_tier(tier if self.forced else self.tier, "forced" if self.forced else "auto")
+    
+    def record(self, frame_ms):
+        """Add one frame's work time and judge each completed window."""
+        self.frame_times.append(frame_ms)
+        if self.forced or len(self.frame_times) < self.frame_times.maxlen:
+            return
+        average = sum(self.frame_times) / len(self.frame_times)
+        self.frame_times.clear()
+        reason = f"avg frame {average:.1f} ms of {self.budget_ms:.1f} ms"
+        
+        if average > self.budget_ms * self.degrade_ratio:
+            self.low_windows = 0
+            if self.tier < len(QUALITY_TIERS) - 1:
+                if self.last_step < 0:
+                    # The last step up did not hold; wait longer before the next try
+                    self.upgrade_windows = min(self.upgrade_windows * 2, self.max_upgrade_windows)
+                else:
+                    self.upgrade_windows = self.base_upgrade_windows
+                self._set_tier(self.tier + 1, reason)
+                self.last_step = 1
+        elif average < self.budget_ms * self.upgrade_ratio:
+            self.low_windows += 1
+            if self.low_windows >= self.upgrade_windows and self.tier > 0:
+                self._set_tier(self.tier - 1, f"{reason}, {self.low_windows} windows")
+                self.last_step = -1
+        else:
+            self.low_windows = 0
+    
+    def _set_tier(self, tier, reason):
+        """Switch tiers, log the change and restart the measurement window."""
+        if tier != self.tier:
+            print(f"Quality: {QUALITY_TIERS[self.tier]['name']} -> "
+                  f"{QUALITY_TIERS[tier]['name']} ({reason})")
+        self.tier = tier
+        self.settings = QUALITY_TIERS[tier]
+        self.frame_times.clear()
+        self.low_windows = 0
+
+
+class ScoreIndex:
+    """Fenwick tree over the bounded score range for fast rank queries.
+
+    Each slot counts how many games finished with that score, so memory
+    stays constant no matter how many games are recorded.
+    """
+    
+    def __init__(self, max_score, counts=None):
+        self.max_score = max_score
+        self.size = max_score + 1
+        self.counts = [0] * self.size
+        self.tree = [0] * (self.size + 1)
+        self.total = 0
+        if counts:
+            for score, count in enumerate(counts[:self.size]):
+                count = int(count)
+                if count < 0:
+                    raise ValueError(f"negative game count {count} for score {score}")
+                self.counts[score] = count
+            self._rebuild()
+    
+    def _rebuild(self):
+        """Build the tree from the raw counts in linear time."""
+        self.tree = [0] + self.counts[:]
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+        self.total = sum(self.counts)
+    
+    def add(self, score, count=1):
+        """Record `count` games that finished with `score`."""
+        score = min(max(0, int(score)), self.max_score)
+        self.counts[score] += count
+        self.total += count
+        i = score + 1
+        while i <= self.size:
+            self.tree[i] += count
+            i += i & -i
+    
+    def count_below(self, score):
+        """Return how many recorded games scored strictly less than `score`."""
+        i = min(max(0, int(score)), self.size)
+        result = 0
+        while i > 0:
+            result += self.tree[i]
+            i -= i & -i
+        return result
+    
+    def select(self, rank):
+        """Return the score of the game at 1-based ascending `rank`."""
+        if rank < 1 or rank > self.total:
+            return None
+        pos = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and self.tree[nxt] < rank:
+                pos = nxt
+                rank -= self.tree[nxt]
+            step >>= 1
+        return pos  # tree index pos + 1 maps to score pos
+    
+    def percent_beaten(self, score):
+        """Percentage of other recorded games that `score` beats.
+
+        Assumes the player's own game has already been recorded.
+        """
+        others = self.total - 1
+        if others <= 0:
+            return None
+        return self.count_below(score) / others * 100
+    
+    def top_scores(self, k):
+        """Return (score, games) pairs covering the best `k` games."""
+        result = []
+        remaining = min(k, self.total)
+        rank = self.total
+        while remaining > 0:
+            score = self.select(rank)
+            games = min(self.counts[score], remaining)
+            result.append((score, games))
+            remaining -= games
+            rank -= self.counts[score]
+        return result
+
+
+class Leaderboard:
+    """Per-difficulty score indexes summed from per-instance histogram files.
+    
+    Every running game writes only the games it recorded itself, to its own
+    file in `directory`, so kiosks sharing one folder never overwrite each
+    other's games. Loading sums every file in the folder.
+    """
+    
+    def __init__(self, directory, max_score, instance=None):
+        self.directory = directory
+        self.max_score = max_score
+        # Host and process id are unique among running games; a later game
+        # that reuses the id picks up the old file's games as its own
+        instance = instance or f"{socket.gethostname()}-{os.getpid()}"
+        self.path = os.path.join(directory, re.sub(r"[^A-Za-z0-9_.-]", "_", instance) + ".json")
+        self.own = {}  # difficulty -> counts recorded by this instance
+        self.indexes = {}
+        self.load()
+    
+    def index(self, difficulty):
+        """Return the score index for a difficulty, creating it if needed."""
+        if difficulty not in self.indexes:
+            self.indexes[difficulty] = ScoreIndex(self.max_score)
+        return self.indexes[difficulty]
+    
+    def _read(self, path):
+        """Return {difficulty: ScoreIndex} for one histogram file."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {difficulty: ScoreIndex(self.max_score, counts)
+                for difficulty, counts in data.get("counts", {}).items()}
+    
+    def load(self):
+        """Sum every histogram file; a missing folder means no games yet."""
+        try:
+            names = sorted(os.listdir(self.directory))
+        except FileNotFoundError:
+            names = []
+        except OSError:
+            print(f"Warning: could not read leaderboard folder {self.directory}")
+            return
+        
+        totals = {}
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                indexes = self._read(path)
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError, TypeError, AttributeError):
+                # Unreadable or malformed: leave that file's games out
+                print(f"Warning: could not read leaderboard at {path}")
+                continue
+            if path == self.path:
+                self.own = {difficulty: index.counts[:] for difficulty, index in indexes.items()}
+            for difficulty, index in indexes.items():
+                counts = totals.setdefault(difficulty, [0] * (self.max_score + 1))
+                for score, count in enumerate(index.counts):
+                    counts[score] += count
+        self.indexes = {difficulty: ScoreIndex(self.max_score, counts)
+                        for difficulty, counts in totals.items()}
+    
+    def save(self):
+        """Write this instance's histograms to its own file atomically.
+        
+        Returns False if the file could not be written.
+        """
+        tmp_path = self.path + ".tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"counts": self.own}, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            print(f"Warning: could not save leaderboard at {self.path}")
+            return False
+        return True
+    
+    def record(self, difficulty, score):
+        """Record a finished game and return the percentage of games it beats."""
+        score = min(max(0, int(score)), self.max_score)
+        counts = self.own.setdefault(difficulty, [0] * (self.max_score + 1))
+        counts[score] += 1
+        if self.save():
+            # Re-read so games other instances recorded since startup count too
+            self.load()
+        else:
+            self.index(difficulty).add(score)
+        return self.index(difficulty).percent_beaten(score)
+
+
+def fact_question(operation, a, b):
+    """Return (question text, answer) for a fact.
+    
+    Division facts store the answer in `a` and the divisor in `b`, so every
+    fact fits the same operand grid.
+    """
+    if operation == '+':
+        return f"{a} {operation} {b}", a + b
+    if operation == '-':
+        return f"{a} {operation} {b}", a - b
+    if operation == '*':
+        return f"{a} {operation} {b}", a * b
+    return f"{a * b} {operation} {b}", a
+
+
+class FactTable:
+    """Per-player answer statistics for every fact, memory-mapped from disk.
+    
+    Slot (operation, a, b) lives at a fixed index in each column. Columns
+    are stored back to back after a 16-byte header, so loading is a single
+    mmap and every column is a typed memoryview written in place.
+    """
+    
+    MAGIC = b"MFCT"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHHI4x")  # magic, version, max operand, fact count
+    COLUMNS = (
+        ("attempts", "I"),
+        ("correct", "I"),
+        ("mean_latency", "f"),  # seconds
+        ("interval", "f"),  # seconds until the next review
+        ("next_due", "d"),  # epoch seconds
+    )
+    
+    def __init__(self, path, max_operand=FACT_MAX_OPERAND):
+        self.path = path
+        self.max_operand = max_operand
+        self.count = len(OPERATIONS) * max_operand * max_operand
+        size = self.HEADER.size + self.count * sum(struct.calcsize(fmt) for _, fmt in self.COLUMNS)
+        if not self._is_valid(size):
+            self._back_up()
+            self._create(size)
+        
+        self.file = open(path, "r+b")
+        self.map = mmap.mmap(self.file.fileno(), size)
+        self.view = memoryview(self.map)
+        self.columns = []
+        offset = self.HEADER.size
+        for name, fmt in self.COLUMNS:
+            width = struct.calcsize(fmt) * self.count
+            column = self.view[offset:offset + width].cast(fmt)
+            setattr(self, name, column)
+            self.columns.append(column)
+            offset += width
+    
+    def _is_valid(self, size):
+        """Return True if the file exists and matches this table's layout."""
+        try:
+            actual_size = os.path.getsize(self.path)
+            with open(self.path, "rb") as f:
+                header = self.HEADER.unpack(f.read(self.HEADER.size))
+        except FileNotFoundError:
+            return False
+        except (OSError, struct.error):
+            print(f"Warning: practice file {self.path} is unreadable; starting fresh")
+            return False
+        expected = (self.MAGIC, self.VERSION, self.max_operand, self.count)
+        if header != expected or actual_size != size:
+            print(f"Warning: practice file {self.path} has layout {header} and {actual_size} bytes, "
+                  f"expected {expected} and {size} bytes; starting fresh")
+            return False
+        return True
+    
+    def _back_up(self):
+        """Move an existing file aside so starting fresh never destroys history."""
+        stem = f"{self.path}.{time.strftime('%Y%m%d-%H%M%S')}"
+        backup = f"{stem}.bak"
+        number = 1
+        while os.path.exists(backup):
+            number += 1
+            backup = f"{stem}-{number}.bak"
+        try:
+            os.replace(self.path, backup)
+        except FileNotFoundError:
+            return
+        print(f"Warning: old practice file kept as {backup}")
+    
+    def _create(self, size):
+        """Write an empty table: a header followed by zeroed columns."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.max_operand, self.count))
+            f.truncate(size)
+    
+    def index(self, operation, a, b):
+        """Return the slot for a fact."""
+        n = self.max_operand
+        return OPERATIONS.index(operation) * n * n + (a - 1) * n + (b - 1)
+    
+    def fact(self, index):
+        """Return (operation, a, b) for a slot."""
+        n = self.max_operand
+        op_index, rest = divmod(index, n * n)
+        a, b = divmod(rest, n)
+        return OPERATIONS[op_index], a + 1, b + 1
+    
+    def flush(self):
+        """Push pending writes to disk."""
+        self.map.flush()
+    
+    def close(self):
+        """Flush and unmap; views must be released before the map closes."""
+        self.flush()
+        for column in self.columns:
+            column.release()
+        self.view.release()
+        self.map.close()
+        self.file.close()
+
+
+class PracticeScheduler:
+    """Pick the next fact from a FactTable.
+    
+    Facts the player has seen sit in a heap keyed by due time; unseen facts
+    wait in a shuffled list and are only introduced when nothing is due.
+    """
+    
+    def __init__(self, table, time_limit):
+        self.table = table
+        self.time_limit = time_limit
+        self.difficulty = None
+        self.heap = []
+        self.new_facts = []
+        self.eligible_cache = {}
     
-    def check_hover(self, mouse_pos):
-        """Check if mouse is hovering over button."""
-        self.is_hovered = self.rect.collidepoint(mouse_pos)
+    def eligible_facts(self, difficulty):
+        """Return the slots of every fact `difficulty` can ask."""
+        if difficulty not in self.eligible_cache:
+            settings = DIFFICULTIES[difficulty]
+            n = settings['max_operand']
+            slots = []
+            for operation in settings['operations']:
+                if operation == '/':
+                    pairs = [(a, b) for a in range(1, DIVISION_MAX + 1)
+                             for b in range(2, DIVISION_MAX + 1)]
+                elif operation == '-':
+                    pairs = [(a, b) for a in range(1, n + 1) for b in range(1, a + 1)]
+                else:
+                    pairs = [(a, b) for a in range(1, n + 1) for b in range(1, n + 1)]
+                slots.extend(self.table.index(operation, a, b) for a, b in pairs)
+            self.eligible_cache[difficulty] = slots
+        return self.eligible_cache[difficulty]
     
-    def is_clicked(self, mouse_pos, mouse_clicked):
-        """Check if button was clicked."""
-        return self.rect.collidepoint(mouse_pos) and mouse_clicked
+    def _build_heap(self, difficulty):
+        """Split eligible facts into a due-time heap and a shuffled new list."""
+        attempts = self.table.attempts
+        next_due = self.table.next_due
+        self.heap = []
+        self.new_facts = []
+        for i in self.eligible_facts(difficulty):
+            if attempts[i]:
+                self.heap.append((next_due[i], random.random(), i))
+            else:
+                self.new_facts.append(i)
+        heapq.heapify(self.heap)
+        random.shuffle(self.new_facts)
+        self.difficulty = difficulty
+    
+    def next_fact(self, difficulty):
+        """Return the most overdue fact, or a new one if nothing is due.
+        
+        The fact is taken out of the schedule until record() puts it back.
+        """
+        if difficulty != self.difficulty or not (self.heap or self.new_facts):
+            self._build_heap(difficulty)
+        if self.heap and (self.heap[0][0] <= time.time() or not self.new_facts):
+            return heapq.heappop(self.heap)[2]
+        return self.new_facts.pop()
+    
+    def record(self, index, correct, latency):
+        """Update a fact's statistics and reschedule it."""
+        table = self.table
+        table.attempts[index] += 1
+        if correct:
+            table.correct[index] += 1
+        table.mean_latency[index] += (latency - table.mean_latency[index]) / table.attempts[index]
+        
+        if correct:
+            # Quick answers push the next review out further than slow ones
+            growth = 2.5 if latency <= self.time_limit / 2 else 1.5
+            interval = max(PRACTICE_FIRST_INTERVAL, table.interval[index] * growth)
+        else:
+            interval = PRACTICE_RETRY_SECONDS
+        table.interval[index] = interval
+        table.next_due[index] = time.time() + interval
+        heapq.heappush(self.heap, (table.next_due[index], random.random(), index))
+
+
+def practice_path(player):
+    """Return the fact-table file for a player name.
+    
+    A hash of the exact name keeps names that sanitise alike, such as
+    "Ana Lee" and "Ana_Lee", in separate files.
+    """
+    safe_name = re.sub(r"[^A-Za-z0-9_-]", "_", player)
+    digest = hashlib.sha1(player.encode("utf-8")).hexdigest()[:8]
+    return os.path.join(PRACTICE_DIR, f"{safe_name}-{digest}.facts")
 
 
 class MathifyGame:
     """Main game class for Mathify."""
     
-    def __init__(self):
-        """Initialize the game."""
+    def __init__(self, pipelined=False, quality_tier=None, player=None):
+        """Initialize the game.
+        
+        With `pipelined` set, a render worker rasterizes each frame into a
+        back buffer while the main thread handles input for the next one.
+        `quality_tier` pins an index into QUALITY_TIERS instead of letting
+        the quality governor choose. Naming a `player` turns on practice
+        mode, which schedules questions from that player's answer history.
+        """
+        self.pipelined = pipelined
+        self.quality = QualityGovernor(forced_tier=quality_tier)
         self.is_fullscreen = False
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption("Mathify")
@@ -147,10 +816,10 @@ class MathifyGame:
         # Game state
         self.state = "welcome"
         self.difficulty = None  # 'easy', 'medium', 'hard'
-        self.total_questions = 10
+        self.total_questions = scoring.QUESTIONS_PER_QUIZ
         self.current_question = 0
         self.score = 0
-        self.user_input = ""
+        self.answer_entry = TextEntry(ANSWER_MAX_LENGTH, integer_char_allowed)
         self.question_text = ""
         self.correct_answer = 0
         self.is_correct = False
@@ -164,32 +833,102 @@ class MathifyGame:
         self.aww_sound = None
         
         # Timer
-        self.time_limit = 15  # seconds per question
+        self.time_limit = scoring.QUESTION_TIME_LIMIT
         self.question_start_time = 0
         self.time_remaining = self.time_limit
         self.time_bonus = 0
         
         # Animation
-        self.fade_alpha = 0
-        self.fade_in = True
+        self.fade_alpha = 0  # opacity of the outgoing frame during a transition
+        self.fade_in = False  # True while the new state fades in
+        self.transition_snapshot = None
+        self.transition_start = None  # None while the incoming screen warms up
+        self.transition_warmup = []  # cache-filling steps left before the fade starts
+        # Off-screen target for warm-up draws, allocated up front
+        self.warmup_surface = pygame.Surface(self.screen.get_size()).convert()
+        self.displayed_state = self.state
         self.pulse = 0
+        self.background_phase = 0
         self.particles = []
         self.progress_width = 0
         self.target_progress_width = 0
         
-        # Button click state
-        self.mouse_clicked_last_frame = False
-
-        # Audio
-        self._initialize_audio()
-        
-        # Initialize fonts
+        # Initialize fonts; buttons render their labels with them
         global TITLE_FONT, LARGE_FONT, MEDIUM_FONT, SMALL_FONT
         TITLE_FONT = pygame.font.Font(None, 72)
         LARGE_FONT = pygame.font.Font(None, 56)
         MEDIUM_FONT = pygame.font.Font(None, 36)
         SMALL_FONT = pygame.font.Font(None, 28)
+        
+        # Buttons live for the whole game so their hover animation carries over frames
+        self.buttons = {
+            "easy": Button(WINDOW_WIDTH // 2 - 320, 360, 180, 60,
+                           "Easy", SUCCESS_COLOR, SUCCESS_DARK,
+                           on_click=lambda: self.select_difficulty('easy')),
+            "medium": Button(WINDOW_WIDTH // 2 - 90, 360, 180, 60,
+                             "Medium", (255, 152, 0), (230, 137, 0),
+                             on_click=lambda: self.select_difficulty('medium')),
+            "hard": Button(WINDOW_WIDTH // 2 + 140, 360, 180, 60,
+                           "Hard", ERROR_COLOR, ERROR_DARK,
+                           on_click=lambda: self.select_difficulty('hard')),
+            "submit": Button(WINDOW_WIDTH // 2 - 100, 490, 200, 50,
+                             "Submit", PRIMARY_COLOR, PRIMARY_DARK,
+                             on_click=self.submit_answer),
+            "play_again": Button(WINDOW_WIDTH // 2 - 220, 480, 180, 50,
+                                 "Play Again", SUCCESS_COLOR, SUCCESS_DARK,
+                                 on_click=self.play_again),
+            "exit": Button(WINDOW_WIDTH // 2 + 40, 480, 180, 50,
+                           "Exit", ERROR_COLOR, ERROR_DARK,
+                           on_click=self.exit_game),
+        }
+        self.screen_buttons = {
+            "welcome": ("easy", "medium", "hard"),
+            "question": ("submit",),
+            "feedback": (),
+            "results": ("play_again", "exit"),
+        }
+        
+        # Input: clicks are handled as events arrive, not sampled once per frame
+        self.dispatcher = InputDispatcher()
+        self.dispatcher.install_filter()
+        for state, names in self.screen_buttons.items():
+            for name in names:
+                self.dispatcher.register(state, self.buttons[name])
+        # SDL may start with text input on; it is only wanted on the question screen
+        pygame.key.stop_text_input()
+        self.results_sound_played = False
+        
+        # Practice mode
+        self.player = player
+        self.practice = None
+        self.current_fact = None
+        if player:
+            self.practice = PracticeScheduler(FactTable(practice_path(player)), self.time_limit)
+        
+        # Leaderboard
+        self.leaderboard = Leaderboard(LEADERBOARD_DIR, self.total_questions * scoring.POINTS_PER_QUESTION)
+        self.percent_beaten = None
+
+        # Audio
+        self._initialize_audio()
+        
+        # Render caches, warmed while the outgoing frame is held on screen
+        self.font_cache = {}
+        self.text_cache = {}
+        # Finished background layers by screen, as (phase, size, surface); a
+        # shared dict so render-worker snapshots fill the same cache
+        self.layer_cache = {}
 
+    @property
+    def user_input(self):
+        """The answer typed so far."""
+        return self.answer_entry.text
+    
+    @user_input.setter
+    def user_input(self, text):
+        self.answer_entry.text = text
+        self.answer_entry.cursor = len(text)
+    
     def toggle_fullscreen(self):
         """Toggle fullscreen using safe flags to avoid renderer errors."""
         self.is_fullscreen = not self.is_fullscreen
@@ -247,26 +986,26 @@ class MathifyGame:
             sound.play()
     
     def generate_question(self):
-        """Generate a random math question based on difficulty."""
-        if self.difficulty == 'easy':
-            operations = ['+', '-']
-            num1 = random.randint(1, 10)
-            num2 = random.randint(1, 10)
-        elif self.difficulty == 'medium':
-            operations = ['+', '-', '*']
-            num1 = random.randint(1, 20)
-            num2 = random.randint(1, 20)
-        else:  # hard
-            operations = ['+', '-', '*', '/']
-            num1 = random.randint(1, 50)
-            num2 = random.randint(1, 50)
+        """Generate a math question based on difficulty.
+        
+        In practice mode the scheduler picks the most overdue fact;
+        otherwise operands are drawn uniformly at random.
+        """
+        if self.practice is not None:
+            self.current_fact = self.practice.next_fact(self.difficulty or 'hard')
+            return fact_question(*self.practice.table.fact(self.current_fact))
+        
+        settings = DIFFICULTIES.get(self.difficulty, DIFFICULTIES['hard'])
+        operations = settings['operations']
+        num1 = random.randint(1, settings['max_operand'])
+        num2 = random.randint(1, settings['max_operand'])
         
         operation = random.choice(operations)
         
         if operation == '/':
             # Ensure division results in whole numbers
-            num2 = random.randint(2, 12)
-            answer = random.randint(1, 12)
+            num2 = random.randint(2, DIVISION_MAX)
+            answer = random.randint(1, DIVISION_MAX)
             num1 = num2 * answer
         else:
             if operation == '-' and num1 < num2:
@@ -284,22 +1023,48 @@ class MathifyGame:
         question = f"{num1} {operation} {num2}"
         return question, answer
     
+    def get_font(self, size):
+        """Return the default font at `size`, loading each size only once."""
+        font = self.font_cache.get(size)
+        if font is None:
+            font = self.font_cache[size] = pygame.font.Font(None, size)
+        return font
+    
+    def render_text(self, text, font, color):
+        """Render text through the cache so unchanged labels cost one blit."""
+        key = (text, font, color)
+        surface = self.text_cache.get(key)
+        if surface is None:
+            if len(self.text_cache) >= TEXT_CACHE_SIZE:
+                self.text_cache.clear()
+            surface = self.text_cache[key] = font.render(text, True, color)
+        return surface
+    
+    def render_text_shadow(self, text, font):
+        """Render the translucent drop shadow for a piece of text, cached."""
+        key = (text, font, None)
+        surface = self.text_cache.get(key)
+        if surface is None:
+            shadow_surface = self.render_text(text, font, DARK_GRAY)
+            surface = pygame.Surface(shadow_surface.get_size(), pygame.SRCALPHA)
+            surface.blit(shadow_surface, (0, 0))
+            surface.set_alpha(50)
+            self.text_cache[key] = surface
+        return surface
+    
     def draw_text_with_shadow(self, text, font, color, x, y, center=True):
         """Draw text with a subtle shadow."""
         # Shadow
-        shadow_surface = font.render(text, True, DARK_GRAY)
-        if center:
-            shadow_rect = shadow_surface.get_rect(center=(x + 2, y + 2))
-        else:
-            shadow_rect = shadow_surface.get_rect(topleft=(x + 2, y + 2))
-        
-        shadow_with_alpha = pygame.Surface(shadow_surface.get_size(), pygame.SRCALPHA)
-        shadow_with_alpha.blit(shadow_surface, (0, 0))
-        shadow_with_alpha.set_alpha(50)
-        self.screen.blit(shadow_with_alpha, shadow_rect)
+        if self.quality.settings["text_shadows"]:
+            shadow_with_alpha = self.render_text_shadow(text, font)
+            if center:
+                shadow_rect = shadow_with_alpha.get_rect(center=(x + 2, y + 2))
+            else:
+                shadow_rect = shadow_with_alpha.get_rect(topleft=(x + 2, y + 2))
+            self.screen.blit(shadow_with_alpha, shadow_rect)
         
         # Main text
-        text_surface = font.render(text, True, color)
+        text_surface = self.render_text(text, font, color)
         if center:
             text_rect = text_surface.get_rect(center=(x, y))
         else:
@@ -309,18 +1074,38 @@ class MathifyGame:
     def draw_card(self, rect, color=WHITE):
         """Draw a card-like container with shadow."""
         # Shadow
+        shadow_mode = self.quality.settings["card_shadows"]
         shadow_rect = rect.copy()
         shadow_rect.y += 6
-        shadow_surface = pygame.Surface((shadow_rect.width, shadow_rect.height), pygame.SRCALPHA)
-        pygame.draw.rect(shadow_surface, SHADOW_COLOR, shadow_surface.get_rect(), border_radius=15)
-        self.screen.blit(shadow_surface, shadow_rect)
+        if shadow_mode == "soft":
+            shadow_surface = pygame.Surface((shadow_rect.width, shadow_rect.height), pygame.SRCALPHA)
+            pygame.draw.rect(shadow_surface, SHADOW_COLOR, shadow_surface.get_rect(), border_radius=15)
+            self.screen.blit(shadow_surface, shadow_rect)
+        elif shadow_mode == "solid":
+            pygame.draw.rect(self.screen, SHADOW_SOLID_COLOR, shadow_rect, border_radius=15)
         
         # Card
         pygame.draw.rect(self.screen, color, rect, border_radius=15)
     
+    def draw_timer_arc(self, center, radius, color):
+        """Draw the pie slice showing how much question time is left."""
+        if self.time_remaining <= 0:
+            return
+        progress_angle = (self.time_remaining / self.time_limit) * 360
+        points = [center]
+        angles = list(range(0, int(progress_angle) + 1, self.quality.settings["arc_step"]))
+        angles.append(progress_angle)
+        for angle in angles:
+            rad = math.radians(angle - 90)
+            x = center[0] + radius * math.cos(rad)
+            y = center[1] + radius * math.sin(rad)
+            points.append((x, y))
+        if len(points) > 2:
+            pygame.draw.polygon(self.screen, (*color, 50), points)
+    
     def draw_progress_bar(self):
         """Draw an animated progress bar."""
-        bar_width = 600
+        bar_width = PROGRESS_BAR_WIDTH
         bar_height = 20
         x = (WINDOW_WIDTH - bar_width) // 2
         y = 20
@@ -330,26 +1115,13 @@ class MathifyGame:
         pygame.draw.rect(self.screen, LIGHT_GRAY, bg_rect, border_radius=10)
         
         # Progress
-        progress = self.current_question / self.total_questions
-        self.target_progress_width = int(bar_width * progress)
-        self.progress_width += (self.target_progress_width - self.progress_width) * 0.1
-        
         if self.progress_width > 0:
             progress_rect = pygame.Rect(x, y, int(self.progress_width), bar_height)
             pygame.draw.rect(self.screen, PRIMARY_COLOR, progress_rect, border_radius=10)
     
     def draw_welcome_screen(self):
         """Draw the welcome screen with animations."""
-        self.screen.fill(BG_COLOR)
-        
-        # Animated background circles
-        self.pulse += 0.05
-        for i in range(3):
-            radius = 100 + i * 80 + int(math.sin(self.pulse + i) * 20)
-            alpha = 20 - i * 5 
-            surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
-            pygame.draw.circle(surface, (*PRIMARY_COLOR, alpha), (radius, radius), radius)
-            self.screen.blit(surface, (WINDOW_WIDTH // 2 - radius, 150 - radius))
+        self.draw_welcome_background()
         
         # Title card
         title_card = pygame.Rect(150, 80, 500, 180)
@@ -364,17 +1136,12 @@ class MathifyGame:
                                    WINDOW_WIDTH // 2, 210)
         
         # Info text
-        self.draw_text_with_shadow("Choose your difficulty level", 
+        info_text = "Choose your difficulty level"
+        if self.player:
+            info_text = f"Practice for {self.player}: choose your level"
+        self.draw_text_with_shadow(info_text, 
                                    SMALL_FONT, DARK_GRAY, WINDOW_WIDTH // 2, 300)
         
-        # Difficulty buttons
-        easy_button = Button(WINDOW_WIDTH // 2 - 320, 360, 180, 60, 
-                            "Easy", SUCCESS_COLOR, SUCCESS_DARK)
-        medium_button = Button(WINDOW_WIDTH // 2 - 90, 360, 180, 60, 
-                              "Medium", (255, 152, 0), (230, 137, 0))
-        hard_button = Button(WINDOW_WIDTH // 2 + 140, 360, 180, 60, 
-                            "Hard", ERROR_COLOR, ERROR_DARK)
-        
         # Difficulty descriptions
         self.draw_text_with_shadow("1-20", SMALL_FONT, TEXT_COLOR,
                                    WINDOW_WIDTH // 2 - 230, 450)
@@ -391,50 +1158,53 @@ class MathifyGame:
         self.draw_text_with_shadow("+  -  ×  ÷", SMALL_FONT, DARK_GRAY,
                                    WINDOW_WIDTH // 2 + 230, 475)
         
-        mouse_pos = pygame.mouse.get_pos()
-        mouse_pressed = pygame.mouse.get_pressed()[0]
-        mouse_clicked = mouse_pressed and not self.mouse_clicked_last_frame
-        
-        easy_button.check_hover(mouse_pos)
-        medium_button.check_hover(mouse_pos)
-        hard_button.check_hover(mouse_pos)
-        
-        easy_button.update()
-        medium_button.update()
-        hard_button.update()
-        
-        easy_button.draw(self.screen)
-        medium_button.draw(self.screen)
-        hard_button.draw(self.screen)
-        
-        if easy_button.is_clicked(mouse_pos, mouse_clicked):
-            self._play_sound(self.click_sound)
-            self.difficulty = 'easy'
-            self.state = "question"
-            self.current_question = 0
-            self.score = 0
-            self.start_new_question()
-        
-        if medium_button.is_clicked(mouse_pos, mouse_clicked):
-            self._play_sound(self.click_sound)
-            self.difficulty = 'medium'
-            self.state = "question"
-            self.current_question = 0
-            self.score = 0
-            self.start_new_question()
-        
-        if hard_button.is_clicked(mouse_pos, mouse_clicked):
-            self._play_sound(self.click_sound)
-            self.difficulty = 'hard'
-            self.state = "question"
-            self.current_question = 0
-            self.score = 0
-            self.start_new_question()
+        self.draw_buttons()
+    
+    def update_welcome(self):
+        """Advance the background animation."""
+        if self.quality.settings["animate_background"]:
+            self.background_phase += 0.1
+    
+    def select_difficulty(self, difficulty):
+        """Start a game at `difficulty` (difficulty button click)."""
+        self._play_sound(self.click_sound)
+        self.difficulty = difficulty
+        self.state = "question"
+        self.current_question = 0
+        self.score = 0
+        self.start_new_question()
+    
+    def draw_welcome_background(self):
+        """Fill the screen and draw the pulsing background circles.
+        
+        While the quality tier freezes the animation, the finished layer is
+        cached and reused with a single blit.
+        """
+        size = self.screen.get_size()
+        frozen = not self.quality.settings["animate_background"]
+        if frozen and "welcome" in self.layer_cache:
+            phase, layer_size, layer = self.layer_cache["welcome"]
+            if phase == self.background_phase and layer_size == size:
+                self.screen.blit(layer, (0, 0))
+                return
+        
+        self.screen.fill(BG_COLOR)
+        
+        # Animated background circles
+        for i in range(3):
+            radius = 100 + i * 80 + int(math.sin(self.background_phase + i) * 20)
+            alpha = 20 - i * 5 
+            surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(surface, (*PRIMARY_COLOR, alpha), (radius, radius), radius)
+            self.screen.blit(surface, (WINDOW_WIDTH // 2 - radius, 150 - radius))
+        
+        if frozen:
+            self.layer_cache["welcome"] = (self.background_phase, size, self.screen.copy())
     
     def start_new_question(self):
         """Start a new question."""
         self.current_question += 1
-        self.user_input = ""
+        self.answer_entry.clear()
         self.question_text, self.correct_answer = self.generate_question()
         self.question_start_time = pygame.time.get_ticks()
         self.time_remaining = self.time_limit
@@ -445,19 +1215,6 @@ class MathifyGame:
         """Draw the question screen with enhanced visuals."""
         self.screen.fill(BG_COLOR)
         
-        # Update time remaining
-        elapsed_time = (pygame.time.get_ticks() - self.question_start_time) / 1000
-        self.time_remaining = max(0, self.time_limit - elapsed_time)
-        
-        # Check if time ran out
-        if self.time_remaining <= 0 and self.state == "question":
-            self.is_correct = False
-            self.has_answered = True
-            self._play_sound(self.wrong_sound)
-            self.state = "feedback"
-            self.feedback_timer = pygame.time.get_ticks()
-            return
-        
         # Progress bar
         self.draw_progress_bar()
         
@@ -496,16 +1253,7 @@ class MathifyGame:
         pygame.draw.circle(self.screen, timer_color, timer_center, timer_radius, 4)
         
         # Draw timer arc (progress)
-        if self.time_remaining > 0:
-            progress_angle = (self.time_remaining / self.time_limit) * 360
-            points = [timer_center]
-            for angle in range(int(progress_angle) + 1):
-                rad = math.radians(angle - 90)
-                x = timer_center[0] + (timer_radius - 8) * math.cos(rad)
-                y = timer_center[1] + (timer_radius - 8) * math.sin(rad)
-                points.append((x, y))
-            if len(points) > 2:
-                pygame.draw.polygon(self.screen, (*timer_color, 50), points)
+        self.draw_timer_arc(timer_center, timer_radius - 8, timer_color)
         
         # Timer text
         timer_text = f"{int(self.time_remaining)}"
@@ -521,8 +1269,9 @@ class MathifyGame:
                                    WINDOW_WIDTH // 2, 240)
         
         # Question with pulse effect
-        pulse_scale = 1.0 + math.sin(self.pulse * 2) * 0.02
-        question_font = pygame.font.Font(None, int(56 * pulse_scale))
+        base_size, swing = PULSE_FONTS["question"]
+        pulse_scale = 1.0 + math.sin(self.pulse * 2) * swing
+        question_font = self.get_font(int(base_size * pulse_scale))
         self.draw_text_with_shadow(self.question_text, question_font, PRIMARY_COLOR, 
                                    WINDOW_WIDTH // 2, 300)
         
@@ -533,25 +1282,58 @@ class MathifyGame:
         
         # User input
         input_text = self.user_input if self.user_input else "?"
-        input_surface = MEDIUM_FONT.render(input_text, True, TEXT_COLOR if self.user_input else LIGHT_GRAY)
+        input_surface = self.render_text(input_text, MEDIUM_FONT, TEXT_COLOR if self.user_input else LIGHT_GRAY)
         input_rect = input_surface.get_rect(center=input_box.center)
         self.screen.blit(input_surface, input_rect)
         
+        # Blinking cursor
+        if self.user_input and int(self.pulse * 2) % 2 == 0:
+            cursor_x = input_rect.left + MEDIUM_FONT.size(self.user_input[:self.answer_entry.cursor])[0]
+            pygame.draw.line(self.screen, TEXT_COLOR, (cursor_x, input_rect.top),
+                             (cursor_x, input_rect.bottom), 2)
+        
         # Submit button
-        submit_button = Button(WINDOW_WIDTH // 2 - 100, 490, 200, 50, 
-                              "Submit", PRIMARY_COLOR, PRIMARY_DARK)
+        self.draw_buttons()
+    
+    def update_time_remaining(self):
+        """Recompute the time left on the current question from the clock."""
+        if self.fade_in:
+            # The clock starts once the question has fully faded in
+            self.time_remaining = self.time_limit
+            return
+        elapsed_time = (pygame.time.get_ticks() - self.question_start_time) / 1000
+        self.time_remaining = max(0, self.time_limit - elapsed_time)
+    
+    def update_question(self):
+        """Tick the question timer and ease the progress bar."""
+        self.update_time_remaining()
         
-        mouse_pos = pygame.mouse.get_pos()
-        mouse_pressed = pygame.mouse.get_pressed()[0]
-        mouse_clicked = mouse_pressed and not self.mouse_clicked_last_frame
+        # Check if time ran out
+        if self.time_remaining <= 0:
+            self.is_correct = False
+            self.has_answered = True
+            self._record_practice()
+            self._play_sound(self.wrong_sound)
+            self.state = "feedback"
+            self.feedback_timer = pygame.time.get_ticks()
+            return
         
-        submit_button.check_hover(mouse_pos)
-        submit_button.update()
-        submit_button.draw(self.screen)
+        # Progress bar animation
+        progress = self.current_question / self.total_questions
+        self.target_progress_width = int(PROGRESS_BAR_WIDTH * progress)
+        self.progress_width += (self.target_progress_width - self.progress_width) * 0.1
+    
+    def submit_answer(self):
+        """Submit the typed answer (Submit click or Enter).
         
-        if submit_button.is_clicked(mouse_pos, mouse_clicked) and self.user_input:
-            self._play_sound(self.click_sound)
-            self.check_answer()
+        The timer is read at submission, so the time bonus reflects when the
+        input arrived rather than when the last frame was updated.
+        """
+        if not self.user_input or self.state != "question":
+            return
+        self.update_time_remaining()
+        self._play_sound(self.click_sound)
+        self.check_answer()
     
     def check_answer(self):
         """Check if the user's answer is correct."""
@@ -562,22 +1344,17 @@ class MathifyGame:
             user_answer = int(self.user_input)
             self.is_correct = (user_answer == self.correct_answer)
             self.has_answered = True
+            self._record_practice()
             
             # Calculate time bonus (up to 5 bonus points for fast answers)
             self.time_bonus = 0
             if self.is_correct:
-                time_percentage = self.time_remaining / self.time_limit
-                if time_percentage > 0.8:  # Answered in first 20% of time
-                    self.time_bonus = 5
-                elif time_percentage > 0.6:
-                    self.time_bonus = 3
-                elif time_percentage > 0.4:
-                    self.time_bonus = 1
-                
-                self.score += 1 + self.time_bonus
+                self.time_bonus = scoring.time_bonus(self.time_remaining, self.time_limit)
+                self.score += scoring.POINTS_PER_CORRECT + self.time_bonus
                 
-                # Create celebration particles
-                for _ in range(30):
+                # Create celebration particles, capped by the quality tier
+                room = self.quality.settings["max_particles"] - len(self.particles)
+                for _ in range(max(0, min(30, room))):
                     self.particles.append(Particle(
                         WINDOW_WIDTH // 2,
                         WINDOW_HEIGHT // 2,
@@ -592,16 +1369,20 @@ class MathifyGame:
         except ValueError:
             pass
     
+    def _record_practice(self):
+        """Feed the answer to the current question back to the practice scheduler."""
+        if self.practice is not None and self.current_fact is not None:
+            latency = self.time_limit - self.time_remaining
+            self.practice.record(self.current_fact, self.is_correct, latency)
+            self.current_fact = None
+    
     def draw_feedback_screen(self):
         """Draw the feedback screen with animations."""
         self.screen.fill(BG_COLOR)
         
-        # Update and draw particles
-        for particle in self.particles[:]:
-            particle.update()
+        # Particles
+        for particle in self.particles:
             particle.draw(self.screen)
-            if particle.is_dead():
-                self.particles.remove(particle)
         
         # Feedback card
         feedback_card = pygame.Rect(150, 100, 500, 400)
@@ -626,8 +1407,9 @@ class MathifyGame:
             color = ERROR_COLOR
         
         # Big feedback word (replaces emoji)
-        scale = 1.0 + math.sin(self.pulse * 3) * 0.1
-        word_font = pygame.font.Font(None, int(72 * scale))
+        base_size, swing = PULSE_FONTS["feedback"]
+        scale = 1.0 + math.sin(self.pulse * 3) * swing
+        word_font = self.get_font(int(base_size * scale))
         self.draw_text_with_shadow(feedback_text, word_font, TEXT_COLOR,
                                    WINDOW_WIDTH // 2, 220)
         
@@ -645,55 +1427,35 @@ class MathifyGame:
         score_text = f"Current Score: {self.score} pts"
         self.draw_text_with_shadow(score_text, MEDIUM_FONT, PRIMARY_COLOR, 
                                    WINDOW_WIDTH // 2, 440)
+    
+    def update_feedback(self):
+        """Move the celebration particles and auto-advance after 1.5 seconds."""
+        for particle in self.particles:
+            particle.update()
+        self.particles = [p for p in self.particles if not p.is_dead()]
         
-        # Auto-advance after 1.5 seconds
         if pygame.time.get_ticks() - self.feedback_timer > 1500:
             if self.current_question < self.total_questions:
                 self.state = "question"
                 self.start_new_question()
             else:
                 self.state = "results"
+                if self.practice is not None:
+                    # Practice quizzes favour missed facts, so they stay off the leaderboard
+                    self.practice.table.flush()
+                else:
+                    self.percent_beaten = self.leaderboard.record(self.difficulty, self.score)
     
     def draw_results_screen(self):
         """Draw the final results screen."""
         self.screen.fill(BG_COLOR)
         
-        # Calculate percentage out of maximum possible points (6 per question)
-        max_points_total = self.total_questions * 6
-        percentage = (self.score / max_points_total) * 100 if max_points_total > 0 else 0
-        
-        # Play sound based on score (only once when entering results screen)
-        if not hasattr(self, 'results_sound_played'):
-            self.results_sound_played = False
-        
-        if not self.results_sound_played:
-            if percentage >= 80:
-                self._play_sound(self.cheer_sound)
-            elif percentage < 60:
-                self._play_sound(self.aww_sound)
-            self.results_sound_played = True
+        percentage = self.score_percentage()
         
         # Determine message and emoji
-        if percentage == 100:
-            message = "Perfect! Outstanding work!"
-            emoji = ":)"
-            color = (255, 215, 0)
-        elif percentage >= 80:
-            message = "Excellent! You're a math star!"
-            emoji = ""
-            color = SUCCESS_COLOR
-        elif percentage >= 60:
-            message = "Good job! Keep practicing!"
-            emoji = ":D"
-            color = PRIMARY_COLOR
-        elif percentage >= 40:
-            message = "Not bad! Room for improvement!"
-            emoji = ":/"
-            color = (255, 152, 0)
-        else:
-            message = "Keep trying! Practice makes perfect!"
-            emoji = ":("
-            color = ERROR_COLOR
+        tier = scoring.result_tier(percentage)
+        message = scoring.RESULT_TIERS[tier][1]
+        emoji, color = RESULT_STYLES[tier]
         
         # Results card
         results_card = pygame.Rect(100, 50, 600, 400)
@@ -704,8 +1466,9 @@ class MathifyGame:
                                    WINDOW_WIDTH // 2, 100)
         
         # Emoji
-        emoji_scale = 1.0 + math.sin(self.pulse * 2) * 0.05
-        emoji_font = pygame.font.Font(None, int(72 * emoji_scale))
+        base_size, swing = PULSE_FONTS["results"]
+        emoji_scale = 1.0 + math.sin(self.pulse * 2) * swing
+        emoji_font = self.get_font(int(base_size * emoji_scale))
         self.draw_text_with_shadow(emoji, emoji_font, TEXT_COLOR, 
                                    WINDOW_WIDTH // 2, 180)
         
@@ -723,61 +1486,227 @@ class MathifyGame:
         self.draw_text_with_shadow(message, SMALL_FONT, color, 
                                    WINDOW_WIDTH // 2, 380)
         
+        # Rank against every recorded game on this difficulty
+        if self.percent_beaten is not None:
+            rank_text = f"You beat {self.percent_beaten:.0f}% of {self.difficulty} players"
+            self.draw_text_with_shadow(rank_text, SMALL_FONT, DARK_GRAY,
+                                       WINDOW_WIDTH // 2, 415)
+        
         # Buttons
-        play_again_button = Button(WINDOW_WIDTH // 2 - 220, 480, 180, 50, 
-                                   "Play Again", SUCCESS_COLOR, SUCCESS_DARK)
-        exit_button = Button(WINDOW_WIDTH // 2 + 40, 480, 180, 50, 
-                            "Exit", ERROR_COLOR, ERROR_DARK)
-        
-        mouse_pos = pygame.mouse.get_pos()
-        mouse_pressed = pygame.mouse.get_pressed()[0]
-        mouse_clicked = mouse_pressed and not self.mouse_clicked_last_frame
-        
-        play_again_button.check_hover(mouse_pos)
-        exit_button.check_hover(mouse_pos)
-        
-        play_again_button.update()
-        exit_button.update()
-        
-        play_again_button.draw(self.screen)
-        exit_button.draw(self.screen)
-        
-        if play_again_button.is_clicked(mouse_pos, mouse_clicked):
-            self._play_sound(self.click_sound)
-            self.state = "welcome"
-            self.difficulty = None
-            self.current_question = 0
-            self.score = 0
-            self.progress_width = 0
-            self.target_progress_width = 0
-            self.results_sound_played = False  # Reset for next game
-        
-        if exit_button.is_clicked(mouse_pos, mouse_clicked):
-            self._play_sound(self.click_sound)
-            self.running = False
+        self.draw_buttons()
+    
+    def score_percentage(self):
+        """Return the score as a percentage of the maximum possible points."""
+        max_points_total = self.total_questions * scoring.POINTS_PER_QUESTION
+        return (self.score / max_points_total) * 100 if max_points_total > 0 else 0
+    
+    def update_results(self):
+        """Play the results sound once on entering the results screen."""
+        if not self.results_sound_played:
+            percentage = self.score_percentage()
+            if percentage >= scoring.CHEER_PERCENTAGE:
+                self._play_sound(self.cheer_sound)
+            elif percentage < scoring.AWW_PERCENTAGE:
+                self._play_sound(self.aww_sound)
+            self.results_sound_played = True
+    
+    def play_again(self):
+        """Return to the welcome screen (Play Again click)."""
+        self._play_sound(self.click_sound)
+        self.state = "welcome"
+        self.difficulty = None
+        self.current_question = 0
+        self.score = 0
+        self.progress_width = 0
+        self.target_progress_width = 0
+        self.percent_beaten = None
+        self.results_sound_played = False  # Reset for next game
+    
+    def exit_game(self):
+        """Stop the game loop (Exit click)."""
+        self._play_sound(self.click_sound)
+        self.running = False
+    
+    def draw_buttons(self):
+        """Draw the buttons that belong to the current screen."""
+        for name in self.screen_buttons[self.state]:
+            self.buttons[name].draw(self.screen, shadow=self.quality.settings["card_shadows"] is not None)
+    
+    def update(self):
+        """Advance game state by one frame without drawing anything."""
+        # Update animations
+        self.pulse += 0.05
+        for name in self.screen_buttons[self.state]:
+            self.buttons[name].update()
+        
+        if self.state == "welcome":
+            self.update_welcome()
+        elif self.state == "question":
+            self.update_question()
+        elif self.state == "feedback":
+            self.update_feedback()
+        elif self.state == "results":
+            self.update_results()
+        
+        self.update_transition()
+    
+    def update_transition(self):
+        """Start a cross-fade on state change and advance a running one.
+        
+        Catches changes made by handle_events as well as by update, and runs
+        before drawing, so self.screen still holds the last presented frame.
+        """
+        if self.state != self.displayed_state:
+            self.displayed_state = self.state
+            # The new screen's buttons may already be under the pointer
+            self.dispatcher.refresh_hover(self.state)
+            if self.state == "question":
+                pygame.key.start_text_input()
+            else:
+                pygame.key.stop_text_input()
+            # One display-format copy of the outgoing frame for the whole fade
+            self.transition_snapshot = self.screen.convert()
+            self.transition_warmup = self.warmup_steps(self.state)
+            self.transition_start = None
+            self.fade_alpha = 255
+            self.fade_in = True
+            return
+        
+        if self.transition_warmup:
+            # Hold the outgoing frame while the incoming screen's caches
+            # fill, a budgeted slice per frame so no frame pays for all of it
+            deadline = time.perf_counter() + TRANSITION_WARMUP_MS / 1000
+            while self.transition_warmup and time.perf_counter() < deadline:
+                self.transition_warmup.pop(0)()
+            if not self.transition_warmup:
+                self.transition_start = pygame.time.get_ticks()
+            return
+        
+        if self.fade_in:
+            elapsed = pygame.time.get_ticks() - self.transition_start
+            self.fade_alpha = max(0, 255 - 255 * elapsed // TRANSITION_MS)
+            if self.fade_alpha == 0:
+                self.fade_in = False
+                self.transition_snapshot = None
+                if self.state == "question":
+                    self.question_start_time = pygame.time.get_ticks()
+    
+    def warmup_steps(self, state):
+        """Return the cache-filling steps to run before `state` fades in."""
+        steps = [self.warm_screen]
+        if state in PULSE_FONTS:
+            base_size, swing = PULSE_FONTS[state]
+            for font_size in range(int(base_size * (1 - swing)), int(base_size * (1 + swing)) + 1):
+                steps.append(lambda font_size=font_size: self.get_font(font_size))
+        return steps
+    
+    def warm_screen(self):
+        """Dry-run the incoming screen off-screen and queue a step per text.
+        
+        The dry run fills the background layer cache but only collects the
+        labels, so their renders can spread over the following frames.
+        """
+        size = self.screen.get_size()
+        if self.warmup_surface.get_size() != size:
+            self.warmup_surface = pygame.Surface(size).convert()
+        frame = self._snapshot(self.warmup_surface)
+        labels = []
+        frame.draw_text_with_shadow = lambda text, font, color, x, y, center=True: labels.append(
+            (text, font, color))
+        frame.draw_state()
+        
+        for text, font, color in labels:
+            def render(text=text, font=font, color=color):
+                self.render_text(text, font, color)
+                if self.quality.settings["text_shadows"]:
+                    self.render_text_shadow(text, font)
+            self.transition_warmup.append(render)
+    
+    def draw(self):
+        """Rasterize the current state onto self.screen and return it."""
+        if self.fade_in and self.transition_start is None:
+            # The incoming screen is not drawn until its caches are warm
+            self.transition_snapshot.set_alpha(None)
+            self.screen.blit(self.transition_snapshot, (0, 0))
+            return self.screen
+        self.draw_state()
+        if self.fade_in:
+            # SDL blends a surface with alpha 255 far slower than it copies one
+            self.transition_snapshot.set_alpha(self.fade_alpha if self.fade_alpha < 255 else None)
+            self.screen.blit(self.transition_snapshot, (0, 0))
+        return self.screen
+    
+    def draw_state(self):
+        """Draw the screen for the current state."""
+        if self.state == "welcome":
+            self.draw_welcome_screen()
+        elif self.state == "question":
+            self.draw_question_screen()
+        elif self.state == "feedback":
+            self.draw_feedback_screen()
+        elif self.state == "results":
+            self.draw_results_screen()
+    
+    def _snapshot(self, surface):
+        """Return a copy of the game that draws the current frame onto `surface`.
+        
+        Everything the draw methods read is either immutable or copied here,
+        so the render worker never sees the main thread's next update.
+        """
+        frame = copy.copy(self)
+        frame.screen = surface
+        frame.particles = [copy.copy(p) for p in self.particles]
+        frame.buttons = {name: copy.copy(b) for name, b in self.buttons.items()}
+        frame.answer_entry = copy.copy(self.answer_entry)
+        return frame
     
     def handle_events(self):
-        """Handle pygame events."""
+        """Handle every pygame event already queued."""
         for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.running = False
-            # Resize window safely without SCALED to avoid renderer issues
-            if event.type == pygame.VIDEORESIZE and not self.is_fullscreen:
-                new_size = (max(400, event.w), max(300, event.h))
-                self.screen = pygame.display.set_mode(new_size, pygame.RESIZABLE)
-            
-            if self.state == "question" and event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_RETURN and self.user_input:
-                    self._play_sound(self.click_sound)
-                    self.check_answer()
-                elif event.key == pygame.K_BACKSPACE:
-                    self.user_input = self.user_input[:-1]
-                elif event.unicode.isdigit() or (event.unicode == '-' and not self.user_input):
-                    if len(self.user_input) < 10:
-                        self.user_input += event.unicode
-            # Global keys
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_F11:
-                self.toggle_fullscreen()
+            self.handle_event(event)
+    
+    def handle_event(self, event):
+        """Handle a single pygame event."""
+        if event.type == pygame.QUIT:
+            self.running = False
+        # Resize window safely without SCALED to avoid renderer issues
+        if event.type == pygame.VIDEORESIZE and not self.is_fullscreen:
+            new_size = (max(400, event.w), max(300, event.h))
+            self.screen = pygame.display.set_mode(new_size, pygame.RESIZABLE)
+        
+        # Mouse events go straight to the widget under the pointer
+        if self.dispatcher.dispatch(event, self.state):
+            return
+        
+        if self.state == "question":
+            if event.type == pygame.TEXTINPUT:
+                self.answer_entry.insert(event.text)
+            elif event.type == pygame.KEYDOWN:
+                if event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+                    self.submit_answer()
+                else:
+                    self.answer_entry.handle_key(event.key)
+        # Global keys
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F11:
+            self.toggle_fullscreen()
+    
+    def wait_for_next_frame(self, frame_start):
+        """Handle input as it arrives until the frame begun at `frame_start` is due.
+        
+        Returns the milliseconds the frame spent working before it started
+        waiting, for the quality governor.
+        """
+        work_ms = pygame.time.get_ticks() - frame_start
+        deadline = frame_start + 1000 // FPS
+        while self.running:
+            remaining = deadline - pygame.time.get_ticks()
+            if remaining <= 0:
+                break
+            event = pygame.event.wait(remaining)
+            if event.type != pygame.NOEVENT:
+                self.handle_event(event)
+        self.clock.tick(FPS)
+        return work_ms
 
     def _resource_path(self, relative_path):
         """Return absolute path for resource both in dev and PyInstaller bundle."""
@@ -787,40 +1716,67 @@ class MathifyGame:
     
     def run(self):
         """Main game loop."""
-        while self.running:
-            # Track mouse click state
-            mouse_pressed = pygame.mouse.get_pressed()[0]
-            
-            self.handle_events()
-            
-            # Update animations
-            self.pulse += 0.05
-            
-            # Draw current state
-            if self.state == "welcome":
-                self.draw_welcome_screen()
-            elif self.state == "question":
-                self.draw_question_screen()
-            elif self.state == "feedback":
-                self.draw_feedback_screen()
-            elif self.state == "results":
-                self.draw_results_screen()
-            
-            pygame.display.flip()
-            self.clock.tick(FPS)
-            
-            # Update mouse click state for next frame
-            self.mouse_clicked_last_frame = mouse_pressed
-        
+        if self.pipelined:
+            self._run_pipelined()
+        else:
+            while self.running:
+                frame_start = pygame.time.get_ticks()
+                self.handle_events()
+                self.update()
+                self.draw()
+                # Input that arrived while drawing is handled before the flip
+                self.handle_events()
+                pygame.display.flip()
+                self.quality.record(self.wait_for_next_frame(frame_start))
+        
+        if self.practice is not None:
+            self.practice.table.close()
         if pygame.mixer.get_init():
             pygame.mixer.music.stop()
         pygame.quit()
         sys.exit()
+    
+    def _run_pipelined(self):
+        """Game loop that rasterizes frame N on a worker while frame N+1 updates.
+        
+        Frames alternate between two back buffers; the main thread presents
+        the finished one, so each frame reaches the display one tick later.
+        """
+        back_buffers = [None, None]
+        index = 0
+        pending = None
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="render") as renderer:
+            while self.running:
+                frame_start = pygame.time.get_ticks()
+                self.handle_events()
+                self.update()
+                
+                # The buffer at `index` was presented last tick, so it is free
+                size = self.screen.get_size()
+                if back_buffers[index] is None or back_buffers[index].get_size() != size:
+                    back_buffers[index] = pygame.Surface(size).convert()
+                next_pending = renderer.submit(self._snapshot(back_buffers[index]).draw)
+                
+                if pending is not None:
+                    self.screen.blit(pending.result(), (0, 0))
+                    pygame.display.flip()
+                pending = next_pending
+                index ^= 1
+                # The worker is rasterizing; take input as it arrives meanwhile
+                self.quality.record(self.wait_for_next_frame(frame_start))
 
 
 def main():
     """Main entry point."""
-    game = MathifyGame()
+    parser = argparse.ArgumentParser(description="Mathify math quiz game")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="rasterize frames on a render worker thread")
+    parser.add_argument("--quality", type=int, choices=range(len(QUALITY_TIERS)),
+                        help="force a quality tier (0 = high) instead of adapting")
+    parser.add_argument("--player", metavar="NAME",
+                        help="practice mode: schedule questions from NAME's answer history")
+    args = parser.parse_args()
+    game = MathifyGame(pipelined=args.pipeline, quality_tier=args.quality, player=args.player)
     game.run()
 
 
@@ -0,0 +1,45 @@
+"""Scoring rules shared by Mathify and its balance simulator.
+
+Kept free of pygame so the simulator can run on machines without a display.
+"""
+
+QUESTIONS_PER_QUIZ = 10
+QUESTION_TIME_LIMIT = 15  # seconds per question
+
+POINTS_PER_CORRECT = 1
+
+# (share of the time limit still remaining, bonus points), best first
+TIME_BONUS_TIERS = [(0.8, 5), (0.6, 3), (0.4, 1)]
+
+POINTS_PER_QUESTION = POINTS_PER_CORRECT + max(bonus for _, bonus in TIME_BONUS_TIERS)
+
+# (minimum percentage of the maximum score, results-screen message), best first
+RESULT_TIERS = [
+    (100, "Perfect! Outstanding work!"),
+    (80, "Excellent! You're a math star!"),
+    (60, "Good job! Keep practicing!"),
+    (40, "Not bad! Room for improvement!"),
+    (0, "Keep trying! Practice makes perfect!"),
+]
+
+# Results-screen sounds: a cheer at or above CHEER_PERCENTAGE, an aww below
+# AWW_PERCENTAGE, and nothing in between
+CHEER_PERCENTAGE = 80
+AWW_PERCENTAGE = 60
+
+
+def time_bonus(time_remaining, time_limit, tiers=TIME_BONUS_TIERS):
+    """Return the bonus points for a correct answer with `time_remaining` left."""
+    time_percentage = time_remaining / time_limit
+    for threshold, bonus in tiers:
+        if time_percentage > threshold:
+            return bonus
+    return 0
+
+
+def result_tier(percentage, tiers=RESULT_TIERS):
+    """Return the index of the results-screen tier a percentage falls in."""
+    for index, (threshold, _) in enumerate(tiers):
+        if percentage >= threshold:
+            return index
+    return len(tiers) - 1
@@ -0,0 +1,235 @@
+"""Monte Carlo simulator for Mathify's scoring and time-bonus balance.
+
+Plays many quizzes per difficulty with simple player models and reports the
+score distribution and the share of players landing in each results-screen
+tier. Quizzes are split into chunks and played in parallel on a process
+pool; with numpy installed each chunk is scored as whole arrays.
+
+    python simulate_scoring.py --quizzes 1000000
+    python simulate_scoring.py --bonus-tiers 0.7:4,0.4:2 --time-limit 12
+    python simulate_scoring.py --points-per-correct 2 --result-tiers 90,70,50,0
+    python simulate_scoring.py --accuracy 0.8 --median-time 5 --difficulty hard
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import mathify_scoring as scoring
+
+# Per difficulty: (chance of a correct answer, median answer time in seconds)
+PLAYER_MODELS = {
+    "struggling": {"easy": (0.75, 7.0), "medium": (0.6, 9.0), "hard": (0.45, 11.0)},
+    "average": {"easy": (0.9, 4.5), "medium": (0.8, 6.5), "hard": (0.65, 8.5)},
+    "strong": {"easy": (0.97, 2.5), "medium": (0.93, 3.5), "hard": (0.85, 5.0)},
+}
+DIFFICULTY_NAMES = ["easy", "medium", "hard"]
+TIME_SIGMA = 0.5  # spread of the log-normal answer-time distribution
+CHUNK_SIZE = 100_000  # quizzes per worker task
+
+
+def max_score(questions, bonus_tiers, points_per_correct):
+    """Return the best possible quiz score under the given rules."""
+    return questions * (points_per_correct + max((b for _, b in bonus_tiers), default=0))
+
+
+def simulate_chunk(job):
+    """Play one chunk of quizzes and return a histogram of final scores.
+
+    Answer times are log-normal around the model's median; an answer slower
+    than the time limit is a timeout and scores nothing, like in the game.
+    """
+    (quizzes, accuracy, median_time, sigma, questions, time_limit, bonus_tiers,
+     points_per_correct, seed) = job
+    top = max_score(questions, bonus_tiers, points_per_correct)
+    if np is not None:
+        rng = np.random.default_rng(seed)
+        times = median_time * np.exp(sigma * rng.standard_normal((quizzes, questions)))
+        remaining = time_limit - times
+        correct = (rng.random((quizzes, questions)) < accuracy) & (remaining > 0)
+        share = remaining / time_limit
+        bonus = np.zeros(share.shape, dtype=np.int64)
+        # Tiers are sorted best first, so write them worst first and let better ones overwrite
+        for threshold, points in reversed(bonus_tiers):
+            bonus[share > threshold] = points
+        scores = (correct * (points_per_correct + bonus)).sum(axis=1)
+        return np.bincount(scores, minlength=top + 1).tolist()
+
+    rng = random.Random(str(seed))
+    log_median = math.log(median_time)
+    histogram = [0] * (top + 1)
+    for _ in range(quizzes):
+        score = 0
+        for _ in range(questions):
+            answer_time = rng.lognormvariate(log_median, sigma)
+            if rng.random() < accuracy and answer_time < time_limit:
+                score += points_per_correct + scoring.time_bonus(
+                    time_limit - answer_time, time_limit, bonus_tiers)
+        histogram[score] += 1
+    return histogram
+
+
+def simulate(pool, quizzes, accuracy, median_time, args, seed):
+    """Spread `quizzes` over the pool and merge the chunk histograms."""
+    jobs = []
+    for index, start in enumerate(range(0, quizzes, CHUNK_SIZE)):
+        chunk = min(CHUNK_SIZE, quizzes - start)
+        jobs.append((chunk, accuracy, median_time, args.sigma, args.questions, args.time_limit,
+                     args.bonus_tiers, args.points_per_correct, [seed, index]))
+    results = pool.map(simulate_chunk, jobs) if pool else map(simulate_chunk, jobs)
+    histogram = [0] * (max_score(args.questions, args.bonus_tiers, args.points_per_correct) + 1)
+    for chunk_histogram in results:
+        for score, count in enumerate(chunk_histogram):
+            histogram[score] += count
+    return histogram
+
+
+def summarize(histogram, top, result_tiers=scoring.RESULT_TIERS):
+    """Return mean, percentiles and results-tier shares for a histogram."""
+    total = sum(histogram)
+    mean = sum(score * count for score, count in enumerate(histogram)) / total
+    percentiles = {}
+    wanted = [10, 25, 50, 75, 90]
+    seen = 0
+    for score, count in enumerate(histogram):
+        seen += count
+        while wanted and seen >= total * wanted[0] / 100:
+            percentiles[f"p{wanted.pop(0)}"] = score
+    tier_counts = [0] * len(result_tiers)
+    for score, count in enumerate(histogram):
+        percentage = score / top * 100 if top else 0
+        tier_counts[scoring.result_tier(percentage, result_tiers)] += count
+    tiers = [{"threshold": threshold, "message": message, "share": count / total}
+             for (threshold, message), count in zip(result_tiers, tier_counts)]
+    return {"mean": mean, "percentiles": percentiles, "tiers": tiers}
+
+
+def parse_bonus_tiers(text):
+    """Parse '0.8:5,0.6:3,0.4:1' into tiers sorted best first."""
+    tiers = []
+    for item in text.split(","):
+        threshold, points = item.split(":")
+        tiers.append((float(threshold), int(points)))
+    return sorted(tiers, reverse=True)
+
+
+def parse_result_tiers(text):
+    """Parse '100,80:Great,0' into results tiers sorted best first.
+
+    A threshold without a message keeps the game's message for it, if any.
+    The lowest threshold must be 0 so every score lands in a tier.
+    """
+    messages = dict(scoring.RESULT_TIERS)
+    tiers = []
+    for item in text.split(","):
+        threshold, _, message = item.partition(":")
+        threshold = int(threshold)
+        tiers.append((threshold, message or messages.get(threshold, "")))
+    tiers.sort(reverse=True)
+    if tiers[-1][0] != 0:
+        raise argparse.ArgumentTypeError(f"lowest threshold must be 0, not {tiers[-1][0]}")
+    return tiers
+
+
+def main():
+    """Command-line entry point."""
+    default_tiers = ",".join(f"{t}:{b}" for t, b in scoring.TIME_BONUS_TIERS)
+    default_results = ",".join(str(t) for t, _ in scoring.RESULT_TIERS)
+    parser = argparse.ArgumentParser(description="Simulate Mathify score distributions")
+    parser.add_argument("--quizzes", type=int, default=1_000_000,
+                        help="quizzes per difficulty and player model")
+    parser.add_argument("--difficulty", choices=DIFFICULTY_NAMES, action="append",
+                        help="difficulty to simulate (repeatable; default: all)")
+    parser.add_argument("--model", choices=sorted(PLAYER_MODELS), action="append",
+                        help="player model to simulate (repeatable; default: all)")
+    parser.add_argument("--accuracy", type=float,
+                        help="custom player: chance of a correct answer (needs --median-time)")
+    parser.add_argument("--median-time", type=float,
+                        help="custom player: median answer time in seconds")
+    parser.add_argument("--sigma", type=float, default=TIME_SIGMA,
+                        help="spread of the log-normal answer-time distribution")
+    parser.add_argument("--questions", type=int, default=scoring.QUESTIONS_PER_QUIZ)
+    parser.add_argument("--time-limit", type=float, default=scoring.QUESTION_TIME_LIMIT)
+    parser.add_argument("--bonus-tiers", type=parse_bonus_tiers, default=parse_bonus_tiers(default_tiers),
+                        help=f"share-of-time-left:bonus pairs (default: {default_tiers})")
+    parser.add_argument("--points-per-correct", type=int, default=scoring.POINTS_PER_CORRECT,
+                        help="points for a correct answer before any time bonus")
+    parser.add_argument("--result-tiers", type=parse_result_tiers, default=scoring.RESULT_TIERS,
+                        help="minimum percentages for the results messages, as THRESHOLD[:MESSAGE] "
+                             f"(default: {default_results})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="also write full results, with histograms, as JSON")
+    args = parser.parse_args()
+
+    if args.quizzes < 1:
+        parser.error("--quizzes must be at least 1")
+    if args.points_per_correct < 0:
+        parser.error("--points-per-correct must not be negative")
+    if (args.accuracy is None) != (args.median_time is None):
+        parser.error("--accuracy and --median-time must be given together")
+    if args.accuracy is not None and not 0 <= args.accuracy <= 1:
+        parser.error("--accuracy must be between 0 and 1")
+    if args.median_time is not None and args.median_time <= 0:
+        parser.error("--median-time must be positive")
+    if args.time_limit <= 0:
+        parser.error("--time-limit must be positive")
+    difficulties = args.difficulty or DIFFICULTY_NAMES
+    if args.accuracy is not None:
+        models = {"custom": {d: (args.accuracy, args.median_time) for d in DIFFICULTY_NAMES}}
+    else:
+        models = {name: PLAYER_MODELS[name] for name in (args.model or sorted(PLAYER_MODELS))}
+
+    top = max_score(args.questions, args.bonus_tiers, args.points_per_correct)
+    print(f"{args.quizzes:,} quizzes per row, {args.questions} questions, "
+          f"{args.time_limit:g}s limit, {args.points_per_correct} pts per correct answer, "
+          f"bonus tiers {args.bonus_tiers}, max {top} pts"
+          f"{'' if np is not None else ' (numpy not installed: pure Python scoring)'}")
+
+    report = []
+    pool = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+    try:
+        for model_index, (model_name, model) in enumerate(models.items()):
+            for difficulty in difficulties:
+                accuracy, median_time = model[difficulty]
+                started = time.perf_counter()
+                seed = args.seed * 1000 + model_index * 10 + DIFFICULTY_NAMES.index(difficulty)
+                histogram = simulate(pool, args.quizzes, accuracy, median_time, args, seed)
+                summary = summarize(histogram, top, args.result_tiers)
+                elapsed = time.perf_counter() - started
+
+                percentiles = " ".join(f"{k}={v}" for k, v in summary["percentiles"].items())
+                print(f"\n{model_name} / {difficulty}: accuracy {accuracy:.0%}, median {median_time:g}s"
+                      f"  ({elapsed:.1f}s)")
+                print(f"  mean {summary['mean']:.1f} pts  {percentiles}")
+                for tier in summary["tiers"]:
+                    print(f"  {tier['share']:7.2%}  >={tier['threshold']:3d}%  {tier['message']}")
+                report.append({"model": model_name, "difficulty": difficulty, "accuracy": accuracy,
+                               "median_time": median_time, "histogram": histogram, **summary})
+    finally:
+        if pool:
+            pool.shutdown()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"quizzes": args.quizzes, "questions": args.questions,
+                       "time_limit": args.time_limit, "sigma": args.sigma,
+                       "bonus_tiers": args.bonus_tiers, "points_per_correct": args.points_per_correct,
+                       "result_tiers": args.result_tiers, "max_score": top, "results": report},
+                      f, indent=2)
+        print(f"\nWrote {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())